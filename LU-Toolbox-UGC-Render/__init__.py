@@ -10,151 +10,177 @@ bl_info = {
 
 import bpy
 import os
-from bpy.types import Operator, Panel
-from bpy.props import EnumProperty, IntProperty, StringProperty, FloatProperty
+from contextlib import contextmanager
+from types import MappingProxyType
+from bpy.types import Operator, Panel, PropertyGroup
+from bpy.props import BoolProperty, EnumProperty, IntProperty, StringProperty, FloatProperty, PointerProperty
 
 # --- imports: meshes-only & UI fitter ---
 from .cam_fit_ui import (
-    collect_render_objects_from_collection as collect_meshes_from_collection,
+    collect_render_sets,
     fit_camera_ui as fit_ui,
 )
 
 # ---------- utilities (paths / append scene & materials) ----------
 
+# Resolved once at import; the addon folder and the bundled .blend don't move.
+_ADDON_DIR = os.path.dirname(os.path.realpath(__file__))
+_UGC_BLEND_PATH = os.path.join(_ADDON_DIR, "UGC_Renders.blend")
+_UGC_BLEND_EXISTS = os.path.exists(_UGC_BLEND_PATH)
+
 def addon_dir() -> str:
-    return os.path.dirname(os.path.realpath(__file__))
+    return _ADDON_DIR
 
 def ugc_blend_path() -> str:
-    return os.path.join(addon_dir(), "UGC_Renders.blend")
-
-def _append_from_blend(block_type: str, name: str):
-    path = ugc_blend_path()
-    if not os.path.exists(path):
-        return False
-    directory = os.path.join(path, block_type)
-    if not directory.endswith(os.sep):
-        directory += os.sep
-    try:
-        bpy.ops.wm.append(
-            filepath=os.path.join(directory, name),
-            directory=directory,
-            filename=name,
-            link=False,
-            autoselect=False
-        )
-        return True
-    except Exception:
-        return False
+    return _UGC_BLEND_PATH
+
+def _load_datablocks(attr: str, names, link: bool = False):
+    """Load `names` from UGC_Renders.blend into bpy.data.<attr> ("scenes", "materials", ...)
+    with one library read; bypasses wm.append's operator/undo overhead."""
+    with bpy.data.libraries.load(_UGC_BLEND_PATH, link=link) as (data_from, data_to):
+        available = getattr(data_from, attr)
+        setattr(data_to, attr, [n for n in names if n in available])
+
+def _ensure_materials(names, link: bool = False):
+    """Return {name: Material} for `names`, loading any missing ones from
+    UGC_Renders.blend in a single library read. Unavailable names map to None.
+    With link=True the materials stay library data instead of being copied in."""
+    misses = [n for n in names if n not in bpy.data.materials]
+    if misses and _UGC_BLEND_EXISTS:
+        try:
+            _load_datablocks("materials", misses, link=link)
+        except OSError:
+            pass
+    return {n: bpy.data.materials.get(n) for n in names}
 
-def get_or_append_material(name: str):
-    mat = bpy.data.materials.get(name)
-    if mat:
-        return mat
-    ok = _append_from_blend("Material", name)
-    return bpy.data.materials.get(name) if ok else None
+def get_or_append_material(name: str, link: bool = False):
+    return _ensure_materials((name,), link=link)[name]
 
 def append_scene(scene_name: str) -> bpy.types.Scene:
     if scene_name in bpy.data.scenes:
         return bpy.data.scenes[scene_name]
-    path = ugc_blend_path()
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"UGC_Renders.blend not found at: {path}")
-
-    directory = os.path.join(path, "Scene")
-    if not directory.endswith(os.sep):
-        directory = directory + os.sep
-
-    bpy.ops.wm.append(
-        filepath=os.path.join(directory, scene_name),
-        directory=directory,
-        filename=scene_name,
-        link=False,
-        autoselect=False
-    )
+    if not _UGC_BLEND_EXISTS:
+        raise FileNotFoundError(f"UGC_Renders.blend not found at: {_UGC_BLEND_PATH}")
+
+    # Always appended: the render writes resolution, camera and collection links
+    # into this scene, which a linked (read-only) scene wouldn't allow.
+    _load_datablocks("scenes", (scene_name,), link=False)
     if scene_name not in bpy.data.scenes:
-        raise RuntimeError(f"Failed to append Scene '{scene_name}' from {path}")
+        raise RuntimeError(f"Failed to append Scene '{scene_name}' from {_UGC_BLEND_PATH}")
     return bpy.data.scenes[scene_name]
 
 # ---------- LOD selection / linking ----------
 
+# Suffix → rank; every suffix is 6 chars, so one slice + dict hit per name.
+_LOD_RANK = {f"_LOD_{i}": i for i in range(0, 5)}
+
 def find_best_lod_collection(scene: bpy.types.Scene):
-    candidates = [f"_LOD_{i}" for i in range(0, 5)]
+    # Single pass; lowest _LOD_N wins, first match wins ties.
     root = scene.collection
-    def all_cols(r):
-        stack = [r]; seen=set()
-        while stack:
-            c = stack.pop()
-            if c.name in seen: continue
-            seen.add(c.name)
-            yield c
-            for cc in c.children: stack.append(cc)
-    cols = list(all_cols(root))
-    for suffix in candidates:
-        for col in cols:
-            if col.name.endswith(suffix):
-                return col
-    return None
+    best, best_rank = None, len(_LOD_RANK)
+    rank_get = _LOD_RANK.get
+    for col in (root, *root.children_recursive):
+        rank = rank_get(col.name[-6:])
+        if rank is not None and rank < best_rank:
+            best, best_rank = col, rank
+            if rank == 0:
+                break
+    return best
 
 def link_collection_into_scene(collection: bpy.types.Collection, target_scene: bpy.types.Scene):
     root = target_scene.collection
-    def is_linked(root_col, col_to_find):
-        stack=[root_col]
-        while stack:
-            c=stack.pop()
-            if c==col_to_find: return True
-            stack.extend(c.children)
-        return False
-    if not is_linked(root, collection):
+    if collection != root and collection not in root.children_recursive:
         try:
             root.children.link(collection)
         except RuntimeError:
             pass
     return collection
 
-# ---------- material remap (render-only) ----------
+# Root object types gathered when the source scene has no _LOD_ collection.
+_MESH_LIKE_TYPES = frozenset({'MESH','CURVE','SURFACE','FONT','META','VOLUME','EMPTY'})
 
-def _collect_mesh_objects_in_collection(col: bpy.types.Collection):
-    objs = set()
-    def walk(c):
-        for o in c.objects:
-            if o.type == 'MESH' and not getattr(o, "hide_render", False):
-                objs.add(o)
-        for cc in c.children:
-            walk(cc)
-    walk(col)
-    return list(objs)
+# ---------- material remap (render-only) ----------
 
 def _remap_materials_for_render(mesh_objs, mapping):
-    record = {}
+    """Swap materials per `mapping` for rendering. Shared meshes are remapped once.
+    Returns [(Mesh|Object, [(slot_index, original_material), ...]), ...]."""
+    # Resolve name targets once; nothing can match if none of the source
+    # materials exist in the file.
+    mat_get = bpy.data.materials.get
+    mapping = {
+        k: (mat_get(v) if isinstance(v, str) else v)
+        for k, v in mapping.items() if k in bpy.data.materials
+    }
+    mapping = {k: v for k, v in mapping.items() if v is not None}
+    if not mapping:
+        return []
+    record = []
+    seen_meshes = set()
+    seen_add = seen_meshes.add
+    map_get = mapping.get
     for obj in mesh_objs:
+        # Library objects/meshes are read-only; leave their slots alone.
+        if obj.library is not None or obj.data.library is not None:
+            continue
         slots = obj.material_slots
         if not slots: continue
-        restore = []
+        # Data-linked slots live on the mesh, so linked duplicates only need the
+        # first visit; object-linked slots are per object and use the slot setter.
+        me = obj.data
+        me_ptr = me.as_pointer()
+        me_seen = me_ptr in seen_meshes
+        seen_add(me_ptr)
+        mats = me.materials
+        mesh_restore, obj_restore = [], []
         for i, slot in enumerate(slots):
-            mat = slot.material
+            by_obj = slot.link == 'OBJECT'
+            if not by_obj and me_seen: continue
+            mat = slot.material if by_obj else mats[i]
             if not mat: continue
-            new_mat = mapping.get(mat.name)
-            if isinstance(new_mat, str):
-                new_mat = bpy.data.materials.get(new_mat)
-            if new_mat and new_mat != mat:
-                restore.append((i, mat.name))
-                slot.material = new_mat
-        if restore:
-            record[obj.name] = restore
+            new_mat = map_get(mat.name)
+            if new_mat is not None and new_mat != mat:
+                if by_obj:
+                    obj_restore.append((i, mat))
+                    slot.material = new_mat
+                else:
+                    mesh_restore.append((i, mat))
+                    mats[i] = new_mat
+        if mesh_restore:
+            record.append((me, mesh_restore))
+        if obj_restore:
+            record.append((obj, obj_restore))
     return record
 
 def _restore_materials(record):
-    for obj_name, slots_info in record.items():
-        obj = bpy.data.objects.get(obj_name)
-        if not obj or not obj.material_slots:
+    # Holds direct datablock references; rendering doesn't free or reallocate them,
+    # but a handler/script could, so a freed owner is skipped rather than raised.
+    Mesh = bpy.types.Mesh
+    for owner, slots_info in record:
+        try:
+            if isinstance(owner, Mesh):
+                mats = owner.materials
+                for idx, mat in slots_info:
+                    if idx < len(mats):
+                        mats[idx] = mat
+                continue
+            slots = owner.material_slots
+            for idx, mat in slots_info:
+                if idx < len(slots):
+                    try:
+                        slots[idx].material = mat
+                    except (ReferenceError, RuntimeError, TypeError):
+                        pass
+        except ReferenceError:
             continue
-        for idx, mat_name in slots_info:
-            mat = bpy.data.materials.get(mat_name)
-            if mat and idx < len(obj.material_slots):
-                try:
-                    obj.material_slots[idx].material = mat
-                except Exception:
-                    pass
+
+@contextmanager
+def _render_materials(mesh_objs, mapping):
+    """Remap materials for the duration of the block; always restored on exit."""
+    record = _remap_materials_for_render(mesh_objs, mapping) if mapping else []
+    try:
+        yield record
+    finally:
+        _restore_materials(record)
 
 # ---------------------------- UI / Operator ----------------------------
 
@@ -164,11 +190,50 @@ UGC_TYPES = [
     ("CAR",        "Car",        "Use the Car preset scene"),
 ]
 
-class LUUGC_OT_RenderIcon(Operator):
-    bl_idname = "luugc.render_icon"
-    bl_label = "Render Icon"
-    bl_options = {'REGISTER', 'UNDO'}
+# UGC type → preset scene name in UGC_Renders.blend (the enum label).
+_UGC_SCENE_NAME = {t[0]: t[1] for t in UGC_TYPES}
+
+# Output file extension → image_settings.file_format
+_FMT_MAP = MappingProxyType({
+    ".png": 'PNG', ".jpg": 'JPEG', ".jpeg": 'JPEG', ".tga": 'TARGA',
+    ".tif": 'TIFF', ".tiff": 'TIFF', ".exr": 'OPEN_EXR', ".hdr": 'HDR', ".bmp": 'BMP',
+})
 
+def _use_eevee(render) -> bool:
+    # Eevee's engine id is BLENDER_EEVEE_NEXT on Blender 4.2-4.x, BLENDER_EEVEE otherwise.
+    for engine in ('BLENDER_EEVEE_NEXT', 'BLENDER_EEVEE'):
+        try:
+            render.engine = engine
+            return True
+        except TypeError:
+            continue
+    return False
+
+def _switch_scene(context, scene):
+    # There's no window in --background; fit/render are given the scene explicitly.
+    if context.window is not None and scene is not None:
+        context.window.scene = scene
+
+def _evaluated_depsgraph(view_layer):
+    """Evaluated depsgraph for `view_layer`; update() creates it if the scene was
+    never shown in a window, and flushes the collection just linked in."""
+    view_layer.update()
+    return view_layer.depsgraph
+
+# Output dirs already created this session; skips makedirs' stat walk on batch runs.
+_MADE_DIRS = set()
+
+def _ensure_target_scene(scene_name: str) -> bpy.types.Scene:
+    """Return the preset scene, appending and preparing it on first use only."""
+    scene = bpy.data.scenes.get(scene_name)
+    if scene is None:
+        scene = append_scene(scene_name)
+        # Keep BVH/textures between renders; repeated icon renders reuse the preset.
+        scene.render.use_persistent_data = True
+    return scene
+
+class _RenderIconSettings:
+    """Operator properties mirrored from Scene.luugc, plus the shared render path."""
     ugc_type: EnumProperty(name="UGC Type", items=UGC_TYPES, default="BRICKBUILD")
     resolution: IntProperty(name="Resolution", default=128, min=32, soft_max=8192)
     margin: FloatProperty(
@@ -179,18 +244,44 @@ class LUUGC_OT_RenderIcon(Operator):
         description="1.00=as framed; <1 tighter; >1 looser (Z-dolly only)"
     )
     save_path: StringProperty(name="Output Path", default="", subtype='FILE_PATH')
+    link_preset: BoolProperty(
+        name="Link Preset Materials",
+        default=True,
+        description="Link render materials from UGC_Renders.blend instead of appending copies"
+    )
+    fast_jpeg: BoolProperty(
+        name="Fast JPEG",
+        default=False,
+        description="Write .png outputs as JPEG (quality 90) when the film isn't transparent; much faster to encode"
+    )
+    png_compression: IntProperty(
+        name="PNG Compression",
+        default=15,
+        min=0,
+        max=100,
+        subtype='PERCENTAGE',
+        description="PNG compression for the saved icon; lower encodes faster, files are slightly larger"
+    )
+    fast_preview: BoolProperty(
+        name="Fast Preview",
+        default=False,
+        description="Render with Eevee at 16 samples instead of the preset's engine (the presets use Cycles)"
+    )
 
     def invoke(self, context, event):
-        sc = context.scene
-        self.ugc_type   = getattr(sc, "luugc_type", self.ugc_type)
-        self.resolution = getattr(sc, "luugc_resolution", self.resolution)
-        self.margin     = getattr(sc, "luugc_margin", self.margin)
-        self.save_path  = getattr(sc, "luugc_save_path", self.save_path)
+        settings = context.scene.luugc
+        for p in _SETTINGS_PROPS:
+            setattr(self, p, getattr(settings, p))
         return self.execute(context)
 
-    def _resolve_output_path(self, context, src_scene):
+    def _resolve_output_path(self, src_scene, per_scene: bool = False):
         if self.save_path.strip():
-            return bpy.path.abspath(self.save_path)
+            outpath = bpy.path.abspath(self.save_path)
+            if not per_scene:
+                return outpath
+            # Batch: keep the chosen folder/extension, name each file after its scene
+            ext = os.path.splitext(outpath)[1] or ".png"
+            return os.path.join(os.path.dirname(outpath), f"{src_scene.name}{ext}")
 
         # No explicit path → save next to .blend using scene name
         blend_path = bpy.data.filepath
@@ -201,97 +292,192 @@ class LUUGC_OT_RenderIcon(Operator):
         out_name = f"{src_scene.name}.png"
         return os.path.join(out_dir, out_name)
 
-    def execute(self, context):
-        prev_scene = context.window.scene
-        src_scene = context.scene
-        scene_name = {"BRICKBUILD":"BrickBuild","ROCKET":"Rocket","CAR":"Car"}[self.ugc_type]
+    def _setup_target(self):
+        """Prepare the preset scene once per run. Returns (scene, camera, mapping) or None."""
+        scene_name = _UGC_SCENE_NAME[self.ugc_type]
 
         # Append preset scene
         try:
-            target_scene = append_scene(scene_name)
+            target_scene = _ensure_target_scene(scene_name)
         except Exception as e:
             self.report({'ERROR'}, f"Append failed: {e}")
-            return {'CANCELLED'}
-
-        context.window.scene = target_scene
+            return None
 
-        # Locate LOD collection in source; link it into target scene.
-        lod_col = find_best_lod_collection(src_scene)
-        if lod_col is None:
-            lod_col = bpy.data.collections.new("UGC_Linked_All")
-            try: target_scene.collection.children.link(lod_col)
-            except RuntimeError: pass
-            for obj in src_scene.objects:
-                if obj.parent is None and obj.type in {'MESH','CURVE','SURFACE','FONT','META','VOLUME','EMPTY'}:
-                    try: lod_col.objects.link(obj)
-                    except RuntimeError: pass
-        else:
-            link_collection_into_scene(lod_col, target_scene)
+        # Camera
+        cam = target_scene.camera or next((o for o in target_scene.objects if o.type == 'CAMERA'), None)
+        if not cam:
+            self.report({'ERROR'}, f"No camera found in target scene '{scene_name}'.")
+            return None
 
-        # Meshes-only for framing & material remap.
-        objs_to_frame = collect_meshes_from_collection(lod_col)
-        mesh_objs     = _collect_mesh_objects_in_collection(lod_col)
+        # Set square resolution
+        target_scene.render.resolution_x = int(self.resolution)
+        target_scene.render.resolution_y = int(self.resolution)
 
         # Ensure render materials exist
-        vc_r  = get_or_append_material("VertexColor_Render")
-        vct_r = get_or_append_material("VertexColorTransparent_Render")
+        render_mats = _ensure_materials(
+            ("VertexColor_Render", "VertexColorTransparent_Render"), link=self.link_preset
+        )
+        vc_r  = render_mats["VertexColor_Render"]
+        vct_r = render_mats["VertexColorTransparent_Render"]
         mapping = {}
         if vc_r:  mapping["VertexColor"] = vc_r
         if vct_r: mapping["VertexColorTransparent"] = vct_r
+        return target_scene, cam, mapping
 
-        # Set square resolution
-        target_scene.render.resolution_x = int(self.resolution)
-        target_scene.render.resolution_y = int(self.resolution)
+    def _render_lod_into(self, context, target_scene, cam, src_scene, lod_col, outpath, mapping):
+        """Swap `lod_col` (or all of src_scene's root objects) into the preset scene, fit, render, swap out."""
+        _switch_scene(context, target_scene)
 
-        # Camera
-        cam = target_scene.camera or next((o for o in target_scene.objects if o.type == 'CAMERA'), None)
-        if not cam:
-            self.report({'ERROR'}, f"No camera found in target scene '{scene_name}'.")
-            context.window.scene = prev_scene
-            return {'CANCELLED'}
+        # Link the LOD collection into the target scene for this render only.
+        root = target_scene.collection
+        created_here = lod_col is None
+        if created_here:
+            lod_col = bpy.data.collections.new("UGC_Linked_All")
+            # Cheap type test first; .parent is only read for candidate types.
+            roots = [o for o in src_scene.objects if o.type in _MESH_LIKE_TYPES and o.parent is None]
+            lod_link = lod_col.objects.link
+            for obj in roots:
+                try: lod_link(obj)
+                except RuntimeError: pass
+        linked_here = lod_col != root and lod_col not in root.children_recursive
+        if linked_here:
+            try: root.children.link(lod_col)
+            except RuntimeError: linked_here = False
+
+        # Visibility and evaluation come from the preset scene's view layer: without a
+        # window (--background) the context scene is still the one the add-on ran from.
+        view_layer = (context.view_layer if context.scene == target_scene
+                      else target_scene.view_layers[0])
 
-        # Resolve output path now; fail gracefully if impossible
-        outpath = self._resolve_output_path(context, src_scene)
-        if not outpath:
-            context.window.scene = prev_scene
-            return {'CANCELLED'}
+        # Meshes-only for framing & material remap.
+        objs_to_frame, mesh_objs = collect_render_sets(lod_col, view_layer)
 
         # Prepare to render
-        restore_record = {}
-        prev_fmt  = target_scene.render.image_settings.file_format
-        prev_path = target_scene.render.filepath
+        img = target_scene.render.image_settings
+        prev_fmt     = img.file_format
+        prev_mode    = img.color_mode
+        prev_quality = img.quality
+        prev_compr   = img.compression
+        prev_path    = target_scene.render.filepath
+        prev_engine  = target_scene.render.engine
+        prev_taa     = target_scene.eevee.taa_render_samples
         try:
-            # remap materials for render
-            if mapping:
-                restore_record = _remap_materials_for_render(mesh_objs, mapping)
-
             # --- FIT (UI operator path) ---
-            # If there's truly no 3D View, this will print and do nothing—user is in UI flow.
-            fit_ui(context, cam, objs_to_frame, framing_scale=self.margin, debug=True)
+            # Without a 3D View (e.g. --background) this falls back to a math-only fit.
+            fit_ui(context, cam, objs_to_frame, framing_scale=self.margin, debug=True,
+                   scene=target_scene, depsgraph=_evaluated_depsgraph(view_layer))
 
             # --- RENDER (always save) ---
-            os.makedirs(os.path.dirname(outpath), exist_ok=True)
-            ext = os.path.splitext(outpath)[1].lower()
-            fmt_map = {
-                ".png": 'PNG', ".jpg": 'JPEG', ".jpeg": 'JPEG', ".tga": 'TARGA',
-                ".tif": 'TIFF', ".tiff": 'TIFF', ".exr": 'OPEN_EXR', ".hdr": 'HDR', ".bmp": 'BMP',
-            }
-            fmt = fmt_map.get(ext, 'PNG')
-            target_scene.render.image_settings.file_format = fmt
+            out_dir = os.path.dirname(outpath)
+            if out_dir not in _MADE_DIRS:
+                os.makedirs(out_dir, exist_ok=True)
+                _MADE_DIRS.add(out_dir)
+            base, ext = os.path.splitext(outpath)
+            ext = ext.lower()
+            # PNG's zlib encode dominates save time; JPEG is fine without alpha.
+            fast_jpeg = self.fast_jpeg and ext == ".png" and not target_scene.render.film_transparent
+            if fast_jpeg:
+                outpath = base + ".jpg"
+                ext = ".jpg"
+            fmt = _FMT_MAP.get(ext, 'PNG')
+            img.file_format = fmt
+            if fast_jpeg:
+                img.quality = 90
+            elif fmt == 'PNG':
+                img.compression = self.png_compression
             target_scene.render.filepath = outpath
-            bpy.ops.render.render(write_still=True)
+            if self.fast_preview and _use_eevee(target_scene.render):
+                target_scene.eevee.taa_render_samples = 16
+            # Must block: materials/settings are restored as soon as this returns.
+            # 'INVOKE_DEFAULT' would start a job and restore before it renders.
+            with _render_materials(mesh_objs, mapping):
+                bpy.ops.render.render('EXEC_DEFAULT', write_still=True, scene=target_scene.name)
             self.report({'INFO'}, f"Saved render: {outpath}")
 
         finally:
-            # Restore materials and previous scene/filepath settings
-            if restore_record:
-                _restore_materials(restore_record)
-            target_scene.render.image_settings.file_format = prev_fmt
+            # Restore previous filepath/format settings and unlink this part
+            img.file_format = prev_fmt
+            try: img.color_mode = prev_mode
+            except TypeError: pass
+            img.quality = prev_quality
+            img.compression = prev_compr
+            target_scene.render.engine = prev_engine
+            target_scene.eevee.taa_render_samples = prev_taa
             target_scene.render.filepath = prev_path
-            context.window.scene = prev_scene
+            if linked_here:
+                try: root.children.unlink(lod_col)
+                except RuntimeError: pass
+            if created_here:
+                # Temporary wrapper; don't leave UGC_Linked_All.001, .002, ... behind.
+                bpy.data.collections.remove(lod_col)
+
+class LUUGC_OT_RenderIcon(_RenderIconSettings, Operator):
+    bl_idname = "luugc.render_icon"
+    bl_label = "Render Icon"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        prev_scene = context.window.scene if context.window else None
+        src_scene = context.scene
+
+        setup = self._setup_target()
+        if setup is None:
+            return {'CANCELLED'}
+        target_scene, cam, mapping = setup
+
+        # Resolve output path now; fail gracefully if impossible
+        outpath = self._resolve_output_path(src_scene)
+        if not outpath:
+            return {'CANCELLED'}
+
+        lod_col = find_best_lod_collection(src_scene)
+        try:
+            self._render_lod_into(context, target_scene, cam, src_scene, lod_col, outpath, mapping)
+        finally:
+            _switch_scene(context, prev_scene)
 
         return {'FINISHED'}
 
+class LUUGC_OT_RenderIconBatch(_RenderIconSettings, Operator):
+    bl_idname = "luugc.render_icon_batch"
+    bl_label = "Render All Icons"
+    bl_description = "Render an icon for every scene that has an _LOD_ collection, reusing one preset scene"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        prev_scene = context.window.scene if context.window else None
+        presets = set(_UGC_SCENE_NAME.values())
+        jobs = []
+        for sc in bpy.data.scenes:
+            if sc.name in presets:
+                continue
+            lod_col = find_best_lod_collection(sc)
+            if lod_col is not None:
+                jobs.append((sc, lod_col))
+        if not jobs:
+            self.report({'WARNING'}, "No scenes with an _LOD_ collection to render.")
+            return {'CANCELLED'}
+
+        # Preset scene, camera and materials are set up once for the whole batch.
+        setup = self._setup_target()
+        if setup is None:
+            return {'CANCELLED'}
+        target_scene, cam, mapping = setup
+
+        done = 0
+        try:
+            for src_scene, lod_col in jobs:
+                outpath = self._resolve_output_path(src_scene, per_scene=True)
+                if not outpath:
+                    return {'CANCELLED'}
+                self._render_lod_into(context, target_scene, cam, src_scene, lod_col, outpath, mapping)
+                done += 1
+        finally:
+            _switch_scene(context, prev_scene)
+
+        self.report({'INFO'}, f"Rendered {done} icon(s).")
+        return {'FINISHED'}
+
 class LUUGC_PT_Panel(Panel):
     bl_label = "LU UGC Render"
     bl_idname = "LUUGC_PT_panel"
@@ -301,44 +487,81 @@ class LUUGC_PT_Panel(Panel):
 
     def draw(self, context):
         layout = self.layout
-        sc = context.scene
+        settings = context.scene.luugc
 
-        layout.prop(sc, "luugc_type", text="UGC Type")
-        layout.prop(sc, "luugc_resolution", text="Resolution")
+        layout.prop(settings, "ugc_type", text="UGC Type")
+        layout.prop(settings, "resolution", text="Resolution")
 
         box = layout.box()
         box.label(text="Camera Fit")
-        box.prop(sc, "luugc_margin", text="Framing Scale")
+        box.prop(settings, "margin", text="Framing Scale")
 
-        layout.prop(sc, "luugc_save_path", text="Output Path")
+        layout.prop(settings, "save_path", text="Output Path")
+        layout.prop(settings, "link_preset", text="Link Preset Materials")
+        layout.prop(settings, "fast_jpeg", text="Fast JPEG")
+        layout.prop(settings, "png_compression", text="PNG Compression")
+        layout.prop(settings, "fast_preview", text="Fast Preview")
 
         op = layout.operator("luugc.render_icon", text="Render Icon", icon='RENDER_STILL')
-        op.ugc_type   = sc.luugc_type
-        op.resolution = sc.luugc_resolution
-        op.margin     = sc.luugc_margin
-        op.save_path  = sc.luugc_save_path
+        for p in _SETTINGS_PROPS:
+            setattr(op, p, getattr(settings, p))
+        op = layout.operator("luugc.render_icon_batch", text="Render All Icons", icon='RENDER_ANIMATION')
+        for p in _SETTINGS_PROPS:
+            setattr(op, p, getattr(settings, p))
 
 # ---------------------------- Scene props ----------------------------
 
-def _register_scene_props():
-    bpy.types.Scene.luugc_type = EnumProperty(name="UGC Type", items=UGC_TYPES, default="BRICKBUILD")
-    bpy.types.Scene.luugc_resolution = IntProperty(name="Resolution", default=128, min=32, soft_max=8192)
-    bpy.types.Scene.luugc_margin = FloatProperty(
+class LUUGCSettings(PropertyGroup):
+    ugc_type: EnumProperty(name="UGC Type", items=UGC_TYPES, default="BRICKBUILD")
+    resolution: IntProperty(name="Resolution", default=128, min=32, soft_max=8192)
+    margin: FloatProperty(
         name="Framing Scale",
         default=1.03,
         min=0.10,
         max=10.00,
         description="1.00=as framed; <1 tighter; >1 looser (Z-dolly only)"
     )
-    bpy.types.Scene.luugc_save_path = StringProperty(name="Output Path", default="", subtype='FILE_PATH')
+    save_path: StringProperty(name="Output Path", default="", subtype='FILE_PATH')
+    link_preset: BoolProperty(
+        name="Link Preset Materials",
+        default=True,
+        description="Link render materials from UGC_Renders.blend instead of appending copies"
+    )
+    fast_jpeg: BoolProperty(
+        name="Fast JPEG",
+        default=False,
+        description="Write .png outputs as JPEG (quality 90) when the film isn't transparent; much faster to encode"
+    )
+    png_compression: IntProperty(
+        name="PNG Compression",
+        default=15,
+        min=0,
+        max=100,
+        subtype='PERCENTAGE',
+        description="PNG compression for the saved icon; lower encodes faster, files are slightly larger"
+    )
+    fast_preview: BoolProperty(
+        name="Fast Preview",
+        default=False,
+        description="Render with Eevee at 16 samples instead of the preset's engine (the presets use Cycles)"
+    )
+
+# Settings copied 1:1 from Scene.luugc onto the render operator.
+_SETTINGS_PROPS = ("ugc_type", "resolution", "margin", "save_path", "link_preset", "fast_jpeg",
+                   "png_compression", "fast_preview")
+
+def _register_scene_props():
+    bpy.types.Scene.luugc = PointerProperty(type=LUUGCSettings)
 
 def _unregister_scene_props():
-    for p in ("luugc_type","luugc_resolution","luugc_margin","luugc_save_path"):
-        if hasattr(bpy.types.Scene, p): delattr(bpy.types.Scene, p)
+    if hasattr(bpy.types.Scene, "luugc"): del bpy.types.Scene.luugc
 
-classes = (LUUGC_OT_RenderIcon, LUUGC_PT_Panel)
+classes = (LUUGCSettings, LUUGC_OT_RenderIcon, LUUGC_OT_RenderIconBatch, LUUGC_PT_Panel)
 
 def register():
+    # Re-check on (re)enable so a .blend restored after import is picked up.
+    global _UGC_BLEND_EXISTS
+    _UGC_BLEND_EXISTS = os.path.exists(_UGC_BLEND_PATH)
     for c in classes: bpy.utils.register_class(c)
     _register_scene_props()
 
@@ -1,138 +1,354 @@
 # cam_fit_ui.py — UI camera fit using Blender operator, meshes-only selection
+# (math-only fallback when there's no 3D View, e.g. --background)
 import bpy
-from mathutils import Vector
-from bpy_extras.object_utils import world_to_camera_view
+import numpy as np
+from collections import namedtuple
 
-__all__ = ["fit_camera_ui", "collect_render_objects_from_collection"]
+__all__ = ["fit_camera_ui", "collect_render_sets", "is_render_candidate"]
+
+# Object types framed by the fit; the operator path selects meshes only.
+_RENDER_TYPES = frozenset({'MESH'})
 
 # Reuse the same meshes-only collector so UI/headless are consistent.
-def _is_render_candidate(o: bpy.types.Object):
-    if o.type != 'MESH':
-        return False
-    if getattr(o, "hide_render", False):
-        return False
-    if hasattr(o, "visible_get") and not o.visible_get():
-        return False
-    return True
+def is_render_candidate(o: bpy.types.Object, view_layer=None):
+    # Type first (cheapest reject); Object always has hide_render and visible_get.
+    # Pass the scene's view layer when it isn't the context one (e.g. --background).
+    return o.type in _RENDER_TYPES and not o.hide_render and o.visible_get(view_layer=view_layer)
+
+def collect_render_sets(col: bpy.types.Collection, view_layer=None):
+    """Single walk of `col` → (objects to frame, meshes to remap).
+    Framing also drops meshes hidden in `view_layer`, so it's a subset of the remap set."""
+    # Dedupe first (objects can sit in several sub-collections), in a stable order.
+    mesh_objs = [
+        o for o in dict.fromkeys(o for c in (col, *col.children_recursive) for o in c.objects)
+        if o.type == 'MESH' and not o.hide_render
+    ]
+    return [o for o in mesh_objs if is_render_candidate(o, view_layer)], mesh_objs
+
+# Object types to_mesh() can convert; anything else is sampled by its bound_box.
+_TO_MESH_TYPES = frozenset({'MESH', 'CURVE', 'SURFACE', 'FONT', 'META'})
 
-def collect_render_objects_from_collection(col: bpy.types.Collection):
-    objs = set()
-    def walk(c):
-        for o in c.objects:
-            if _is_render_candidate(o):
-                objs.add(o)
-        for cc in c.children:
-            walk(cc)
-    walk(col)
-    return list(objs)
-
-def _cam_axes(cam: bpy.types.Object):
-    q = cam.matrix_world.to_quaternion()
-    right = q @ Vector((1,0,0))
-    up    = q @ Vector((0,1,0))
-    fwd   = -(q @ Vector((0,0,1)))
-    return right, up, fwd
-
-def _screen_half_extent(scene, cam, objs):
-    # Evaluate vertex set quickly (use bbox if you want even faster)
-    dg = bpy.context.evaluated_depsgraph_get()
-    pts = []
+def _world_points(objs, depsgraph=None):
+    """World-space sample points for `objs` as an (N,3) array: evaluated mesh
+    vertices, or bound_box corners for objects that don't yield a mesh.
+    `depsgraph` defaults to the context's; pass the framed scene's otherwise."""
+    dg = depsgraph or bpy.context.evaluated_depsgraph_get()
+    chunks = []
+    bb_objs = []
+    # Local coords bucketed by exact world matrix bytes: objects sharing a transform
+    # (e.g. unparented parts of one model) get transformed in one matmul.
+    groups = {}
     for o in objs:
         ob_eval = o.evaluated_get(dg)
-        try:
-            me = ob_eval.to_mesh()
-        except RuntimeError:
-            me = None
-        if me:
-            mw = ob_eval.matrix_world
-            for v in me.vertices:
-                pts.append(mw @ v.co)
-            ob_eval.to_mesh_clear()
+        co = None
+        if o.type in _TO_MESH_TYPES:
+            # Only .co is read, so skip copying UV/color/custom layers.
+            try:
+                me = ob_eval.to_mesh(preserve_all_data_layers=False, depsgraph=dg)
+                if me:
+                    n = len(me.vertices)
+                    co = np.empty(n * 3, dtype=np.float32)
+                    me.vertices.foreach_get("co", co)
+                    co = co.reshape(n, 3)
+            except RuntimeError:
+                co = None
+            finally:
+                ob_eval.to_mesh_clear()
+        if co is not None:
+            M = np.array(ob_eval.matrix_world, dtype=np.float64)
+            groups.setdefault(M.tobytes(), (M, []))[1].append(co)
         else:
-            bb = getattr(ob_eval, "bound_box", None)
-            if bb:
-                mw = ob_eval.matrix_world
-                for c in bb:
-                    pts.append(mw @ Vector(c))
-    if not pts:
+            bb_objs.append(ob_eval)
+    for M, cos in groups.values():
+        co = cos[0] if len(cos) == 1 else np.concatenate(cos)
+        chunks.append(co @ M[:3, :3].T + M[:3, 3])
+    if bb_objs:
+        # All bbox corners in one batched transform: (n,4,4) x (n,8,4) -> (n,8,4)
+        # bound_box converts as one buffer per object; no per-corner Vector wrapping.
+        corners = np.array([ob.bound_box for ob in bb_objs], dtype=np.float64).reshape(-1, 8, 3)
+        homog = np.concatenate([corners, np.ones(corners.shape[:2] + (1,))], axis=2)
+        mws = np.array([ob.matrix_world for ob in bb_objs], dtype=np.float64)
+        chunks.append(np.einsum('nij,nkj->nki', mws, homog)[..., :3].reshape(-1, 3))
+    return np.concatenate(chunks) if chunks else np.empty((0, 3))
+
+class _CamCache:
+    """Camera transform for one fit. Fitting never rotates the camera, so the
+    rotation, its inverse and the basis vectors are built once; moves are applied
+    to camera-space points directly instead of re-projecting."""
+    __slots__ = ("R", "Minv", "right", "up", "fwd")
+
+    def __init__(self, cam):
+        # matrix_basis reflects a just-written cam.location immediately;
+        # matrix_world only after a depsgraph update.
+        m = cam.matrix_world if (cam.parent or cam.constraints) else cam.matrix_basis
+        m = m.normalized()
+        self.R = np.array(m.to_3x3(), dtype=np.float64)   # columns: right, up, back
+        self.Minv = np.array(m.inverted(), dtype=np.float64)
+        self.right, self.up, self.fwd = self.R[:, 0], self.R[:, 1], -self.R[:, 2]
+
+    def to_cam(self, pts):
+        """(N,3) world points → camera space (scale-free, as world_to_camera_view)."""
+        return pts @ self.Minv[:3, :3].T + self.Minv[:3, 3]
+
+# Camera frame at unit depth (persp) in camera space, plus the derived sizes every
+# fit step uses; read from the camera once per fit by _projection_params.
+_ProjectionParams = namedtuple(
+    "_ProjectionParams", "min_x max_x min_y max_y width height cx cy ortho")
+
+def _projection_params(scene, cam):
+    """One pass over the camera/render settings (through view_frame, so sensor fit,
+    aspect and shift match world_to_camera_view) → _ProjectionParams."""
+    cd = cam.data
+    ortho = cd.type == 'ORTHO'
+    tr, br, bl = cd.view_frame(scene=scene)[:3]
+    k = 1.0 if ortho else 1.0 / abs(tr.z)
+    min_x, max_x, min_y, max_y = bl.x * k, br.x * k, br.y * k, tr.y * k
+    return _ProjectionParams(min_x, max_x, min_y, max_y, max_x - min_x, max_y - min_y,
+                             0.5 * (min_x + max_x), 0.5 * (min_y + max_y), ortho)
+
+def _frame_matrix(pp):
+    """(3,4) camera-space → (u*w, v*w, w) matrix: world_to_camera_view's frame
+    normalization (and perspective divide setup) folded into one, so a projection
+    pass is a single matmul plus one divide."""
+    iw, ih = 1.0 / pp.width, 1.0 / pp.height
+    if pp.ortho:
+        return np.array(((iw, 0.0, 0.0, -pp.min_x * iw),
+                         (0.0, ih, 0.0, -pp.min_y * ih),
+                         (0.0, 0.0, 0.0, 1.0)))
+    # Depth is -z in camera space; (x/depth - min_x)/width == (x + min_x*z)/width / -z.
+    return np.array(((iw, 0.0, pp.min_x * iw, 0.0),
+                     (0.0, ih, pp.min_y * ih, 0.0),
+                     (0.0, 0.0, -1.0, 0.0)))
+
+def _half_extent(co, P):
+    """Largest distance of any camera-space point from frame centre, in UV units
+    (world_to_camera_view's u/v, vectorized). `P` comes from _frame_matrix."""
+    if not len(co):
         return 0.5
-    umin, umax, vmin, vmax = 1.0, 0.0, 1.0, 0.0
-    for pt in pts:
-        uvw = world_to_camera_view(scene, scene.camera, pt)
-        u, v = float(uvw.x), float(uvw.y)
-        umin = min(umin, u); umax = max(umax, u)
-        vmin = min(vmin, v); vmax = max(vmax, v)
-    return max(umax - 0.5, 0.5 - umin, vmax - 0.5, 0.5 - vmin)
-
-def fit_camera_ui(context, cam, objects, framing_scale: float = 1.03, debug=True):
-    """Use Blender's Align Active Camera to Selected, but only for mesh objects.
-    Then Z-dolly to match framing_scale (no rotation/FOV change)."""
-    scene = context.scene
-    view3d = next((a for a in context.window.screen.areas if a.type == 'VIEW_3D'), None)
+    clip = co @ P[:, :3].T
+    clip += P[:, 3]
+    w = clip[:, 2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv_w = 1.0 / w  # one divide, shared by u and v
+        u = clip[:, 0] * inv_w
+        v = clip[:, 1] * inv_w
+    on_plane = w == 0.0
+    u[on_plane] = 0.5
+    v[on_plane] = 0.5
+    return float(max(u.max() - 0.5, 0.5 - u.min(), v.max() - 0.5, 0.5 - v.min()))
+
+# Last fit per scene: {scene name: (signature, cam location, ortho_scale, framed)}
+# `framed` is the framing_scale already baked into the pose (math fit), else None.
+_FIT_CACHE = {}
+
+def _fit_signature(scene, cam, objs, pts):
+    """Everything the fitted pose depends on, except cam location. `pts` are the
+    objects' evaluated world points (_world_points): hashing them catches any vertex,
+    modifier or transform change, not just ones that move the bounding box."""
+    r = scene.render
+    cd = cam.data
+    return hash((
+        tuple(sorted(o.name for o in objs)),
+        hash(pts.tobytes()),
+        tuple(round(x, 6) for row in cam.matrix_world.to_3x3() for x in row),
+        cd.type, cd.lens, cd.sensor_fit, cd.sensor_width, cd.sensor_height, cd.shift_x, cd.shift_y,
+        cd.clip_start,
+        r.resolution_x, r.resolution_y, r.resolution_percentage, r.pixel_aspect_x, r.pixel_aspect_y,
+    ))
+
+def _find_view3d(window):
+    """(area, region) of the first 3D View in `window`, or (None, None).
+    Never retypes areas to make one; background sessions have no UI to search."""
+    if window is None or bpy.app.background:
+        return None, None
+    area = next((a for a in window.screen.areas if a.type == 'VIEW_3D'), None)
+    if area is None:
+        return None, None
+    region = next((r for r in area.regions if r.type == 'WINDOW'), None)
+    return (area, region) if region else (None, None)
+
+def _align_camera_to_selected(context, scene, cam, mesh_objs):
+    view3d, region = _find_view3d(context.window)
     if not view3d:
-        print("[UGC UI Fit] No VIEW_3D area found.")
-        return
+        if context.window is not None and not bpy.app.background:
+            print("[UGC UI Fit] No VIEW_3D area found.")
+        return False
 
-    # Select meshes only
-    for o in context.selected_objects:
-        o.select_set(False)
-    mesh_objs = [o for o in objects if _is_render_candidate(o)]
-    if not mesh_objs:
-        print("[UGC UI Fit] No mesh objects to frame.")
-        return
+    # Select meshes only; query the selection once and only flip what differs.
+    view_layer = context.view_layer
+    prev_sel = context.selected_objects
+    prev_active = view_layer.objects.active
+    targets, prev = set(mesh_objs), set(prev_sel)
+    for o in prev_sel:
+        if o not in targets:
+            o.select_set(False)
     for o in mesh_objs:
-        o.select_set(True)
-    context.view_layer.objects.active = mesh_objs[0]
-
-    # Ensure the active camera is the one we’re framing with.
-    scene.camera = cam
+        if o not in prev:
+            o.select_set(True)
+    view_layer.objects.active = mesh_objs[0]
 
     # Run operator in the 3D View context
     override = {
         "window": context.window,
-        "screen": context.window.screen,
         "area": view3d,
-        "region": next(r for r in view3d.regions if r.type == 'WINDOW'),
+        "region": region,
         "scene": scene,
         "view_layer": context.view_layer,
         "active_object": cam,
         "selected_objects": mesh_objs,
         "selected_editable_objects": mesh_objs,
     }
-    bpy.ops.view3d.camera_to_view_selected(override)
+    if hasattr(context, "temp_override"):  # Blender 3.2+
+        with context.temp_override(**override):
+            bpy.ops.view3d.camera_to_view_selected()
+    else:
+        override["screen"] = context.window.screen
+        bpy.ops.view3d.camera_to_view_selected(override)
+
+    # Put the user's selection back the same way.
+    for o in mesh_objs:
+        if o not in prev:
+            o.select_set(False)
+    for o in prev_sel:
+        if o not in targets:
+            try: o.select_set(True)
+            except RuntimeError: pass
+    view_layer.objects.active = prev_active
+    return True
+
+def _fit_math(scene, cam, pts, framing_scale=1.0):
+    """Operator-free stand-in for camera_to_view_selected: keep the camera's rotation,
+    centre the world points `pts` (see _world_points) in frame, then move along the
+    view axis (or resize an ortho camera) until they fill 1/framing_scale of it.
+    One closed-form solve, so no dolly search is needed afterwards. Lens shift is
+    ignored."""
+    if not len(pts):
+        return False
+    cc = _CamCache(cam)
+    co = cc.to_cam(pts)
+    x, y, d = co[:, 0], co[:, 1], -co[:, 2]
+    pp = _projection_params(scene, cam)
+    # Usable half-frame after the framing margin.
+    k = 0.5 / framing_scale
+    half_x, half_y = k * pp.width, k * pp.height
+    # One min + one max reduction over xyz gives the centre, extents and nearest depth.
+    lo, hi = co.min(axis=0), co.max(axis=0)
+    cx, cy = 0.5 * (lo[0] + hi[0]), 0.5 * (lo[1] + hi[1])
+    d_min = -float(hi[2])
+    cd = cam.data
+    if pp.ortho:
+        # Frame size scales with ortho_scale; depth only has to clear the near clip.
+        fill = max(0.5 * (hi[0] - lo[0]) / half_x, 0.5 * (hi[1] - lo[1]) / half_y)
+        if fill > 1e-9:
+            cd.ortho_scale *= fill
+        back = 0.0
+    else:
+        # Depth each point needs to sit inside the frame once centred (frame at unit depth).
+        # One pass per term into two reused buffers (no per-op temporaries).
+        need = np.subtract(x, cx)
+        np.abs(need, out=need)
+        need *= 1.0 / half_x
+        tmp = np.subtract(y, cy)
+        np.abs(tmp, out=tmp)
+        tmp *= 1.0 / half_y
+        np.maximum(need, tmp, out=need)
+        need -= d
+        back = float(need.max())
+    back = max(back, cd.clip_start - d_min)
+    cam.location = tuple(np.array(cam.location) + cc.right * cx + cc.up * cy - cc.fwd * back)
+    return True
+
+def fit_camera_ui(context, cam, objects, framing_scale: float = 1.03, debug=True, scene=None,
+                  depsgraph=None):
+    """Use Blender's Align Active Camera to Selected, but only for mesh objects.
+    Then Z-dolly to match framing_scale (no rotation/FOV change).
+    Without a 3D View (or window, in --background) a math-only fit is used instead.
+    The aligned pose is cached; unchanged objects/camera skip the operator.
+    `objects` must already be filtered (collect_render_sets /
+    is_render_candidate); they aren't re-checked here. Pass `depsgraph` (evaluated,
+    for `scene`'s view layer) when `scene` isn't the context scene."""
+    scene = scene or context.scene
+    mesh_objs = list(objects)
+    if not mesh_objs:
+        print("[UGC UI Fit] No mesh objects to frame.")
+        return
 
-    # Z-dolly for framing scale parity
-    base = _screen_half_extent(scene, cam, mesh_objs)
+    # Ensure the active camera is the one we’re framing with.
+    scene.camera = cam
+
+    # One point buffer for the whole framing sequence (math fit and dolly). It is
+    # not kept across calls: nothing in the Python API says when evaluated
+    # geometry last changed, so a later call always samples afresh.
+    pts = _world_points(mesh_objs, depsgraph)
+
+    sig = _fit_signature(scene, cam, mesh_objs, pts)
+    cached = _FIT_CACHE.get(scene.name)
+    if cached and cached[0] == sig and cached[3] in (None, framing_scale):
+        cam.location = cached[1]
+        cam.data.ortho_scale = cached[2]
+        framed = cached[3]
+        if debug:
+            print("[UGC UI Fit] Reusing cached camera alignment.")
+    else:
+        framed = None
+        if not _align_camera_to_selected(context, scene, cam, mesh_objs):
+            if debug:
+                print("[UGC UI Fit] Using math fit (no 3D View).")
+            if not _fit_math(scene, cam, pts, framing_scale):
+                return
+            framed = framing_scale
+        _FIT_CACHE[scene.name] = (sig, cam.location.copy(), cam.data.ortho_scale, framed)
+
+    if framed is not None:
+        # The math fit solved for framing_scale directly; nothing left to dolly.
+        if debug:
+            print(f"[UGC UI Fit] OK. pos={tuple(round(v,6) for v in cam.location)}")
+        return
+
+    # Z-dolly for framing scale parity. Moving the camera doesn't change the
+    # (unit-depth) frame, so sensor/lens/resolution are read once here.
+    pp = _projection_params(scene, cam)
+    cc = _CamCache(cam)
+    # One view transform; the base extent and the dolly solve share it.
+    co = cc.to_cam(pts)
+    base = _half_extent(co, _frame_matrix(pp))
     if base > 1e-6 and abs(framing_scale - 1.0) >= 1e-6:
-        _, _, fwd = _cam_axes(cam)
         target = base / framing_scale
-        origin = cam.location.copy()
-        dir_vec = (-fwd) if (target < base) else (fwd)
-
         if debug:
             print(f"[UGC UI Fit] Dolly: base={base:.6f} target={target:.6f} "
                   f"dir={'backward(-fwd)' if (target < base) else 'forward(+fwd)'}")
-
-        lo, hi, step = 0.0, 0.0, 0.05
-        for _ in range(24):
-            test = hi + step
-            cam.location = origin + dir_vec * test
-            h = _screen_half_extent(scene, cam, mesh_objs)
-            if (target < base and h <= target) or (target > base and h >= target):
-                hi = test
-                break
-            hi = test
-            step *= 1.6
-        if hi > 0.0:
-            for _ in range(28):
-                mid = 0.5 * (lo + hi)
-                cam.location = origin + dir_vec * mid
-                h = _screen_half_extent(scene, cam, mesh_objs)
-                if (target < base and h > target) or (target > base and h < target):
-                    lo = mid
-                else:
-                    hi = mid
-            cam.location = origin + dir_vec * hi
+        if pp.ortho:
+            # The frame scales with ortho_scale about its centre; dollying does nothing.
+            cam.data.ortho_scale *= framing_scale
+        else:
+            # Target window at unit depth, centred on the frame like the UV half-extent.
+            hx, hy = target * pp.width, target * pp.height
+            lo_x, hi_x, lo_y, hi_y = pp.cx - hx, pp.cx + hx, pp.cy - hy, pp.cy + hy
+            if lo_x < 0.0 < hi_x and lo_y < 0.0 < hi_y:
+                # Exact dolly: the smallest depth shift t that puts every x/(d+t) and
+                # y/(d+t) inside the window; the limiting point lands on its edge.
+                x, y = co[:, 0], co[:, 1]
+                # Two reused buffers instead of one temporary per multiply/max;
+                # window edges inverted once so each point costs multiplies only.
+                need = np.multiply(x, 1.0 / hi_x)
+                tmp = np.multiply(x, 1.0 / lo_x)
+                np.maximum(need, tmp, out=need)
+                np.multiply(y, 1.0 / hi_y, out=tmp)
+                np.maximum(need, tmp, out=need)
+                np.multiply(y, 1.0 / lo_y, out=tmp)
+                np.maximum(need, tmp, out=need)
+                need += co[:, 2]  # camera-space z is -depth
+                t = float(need.max())
+                # Near-clip guard from the same points: nearest depth after the move
+                # is d_min + t, so only the scalar test runs in the common case.
+                d_min = -float(co[:, 2].max())
+                if d_min + t < cam.data.clip_start:
+                    t = cam.data.clip_start - d_min
+                    if debug:
+                        print("[UGC UI Fit] Dolly clamped to keep geometry past clip_start.")
+                cam.location = tuple(np.array(cam.location) - cc.fwd * t)
+            elif debug:
+                print("[UGC UI Fit] Frame window excludes its centre (lens shift); dolly skipped.")
 
     if debug:
         print(f"[UGC UI Fit] OK. pos={tuple(round(v,6) for v in cam.location)}")